@@ -4,4 +4,11 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "super-secret")
-    JWT_ACCESS_TOKEN_EXPIRES = 86400  # 24 hours in seconds
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = 86400  # 24 hours in seconds
+
+    # Request profiling (off unless a secret or sample rate is set)
+    PROFILE_SECRET = os.getenv("PROFILE_SECRET")
+    PROFILE_SAMPLE_RATE = os.getenv("PROFILE_SAMPLE_RATE", "0")
+    PROFILE_PATHS = os.getenv("PROFILE_PATHS", "/api/bucket-list,/api/profile").split(",")
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_MAX_FILES = os.getenv("PROFILE_MAX_FILES", "50")
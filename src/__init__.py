@@ -27,6 +27,9 @@ def create_app():
     app.register_blueprint(movies.bp)
     app.register_blueprint(genres.bp)
     
+    from .profiling import init_profiling
+    init_profiling(app)
+    
     @app.route('/')
     def home():
         return {'message': 'Movie API is running', 'status': 'success'}
@@ -0,0 +1,305 @@
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import click
+from flask import current_app, g, has_request_context, request
+from flask.cli import AppGroup
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_HEADER = 'X-Profile-Signature'
+
+# cProfile allows a single active profiler per process (enforced from 3.12),
+# so only one request is captured at a time
+_profile_lock = threading.Lock()
+
+# Captures are written off the request path, one at a time so rotation is serialized
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='profile-writer')
+
+profiles_cli = AppGroup('profiles', help='Inspect captured request profiles.')
+
+
+def init_profiling(app):
+    app.cli.add_command(profiles_cli)
+
+    try:
+        rate = float(app.config.get('PROFILE_SAMPLE_RATE') or 0)
+        max_files = int(app.config.get('PROFILE_MAX_FILES') or 50)
+    except (TypeError, ValueError):
+        app.logger.warning(
+            'Invalid PROFILE_SAMPLE_RATE %r or PROFILE_MAX_FILES %r, request profiling disabled',
+            app.config.get('PROFILE_SAMPLE_RATE'), app.config.get('PROFILE_MAX_FILES'))
+        return
+    app.config['PROFILE_SAMPLE_RATE'] = min(max(rate, 0.0), 1.0)
+    app.config['PROFILE_MAX_FILES'] = max(max_files, 1)
+
+    paths = app.config.get('PROFILE_PATHS') or []
+    if isinstance(paths, str):
+        paths = paths.split(',')
+    app.config['PROFILE_PATHS'] = [p.strip() for p in paths if p.strip()]
+
+    # Nothing is hooked into the request cycle unless profiling is configured
+    if not app.config.get('PROFILE_SECRET') and not app.config['PROFILE_SAMPLE_RATE']:
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_start_profile)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_profile)
+
+
+def sign_path(secret, path, expires):
+    digest = hmac.new(secret.encode(), f'{path}|{int(expires)}'.encode(), hashlib.sha256).hexdigest()
+    return f'{int(expires)}.{digest}'
+
+
+def verify_signature(secret, path, signature, now=None):
+    expires, _, _ = signature.partition('.')
+    try:
+        expires = int(expires)
+    except ValueError:
+        return False
+    if expires < (now if now is not None else time.time()):
+        return False
+    # Header values are arbitrary latin-1 text, compare_digest only takes ASCII str
+    expected = sign_path(secret, path, expires).encode()
+    return hmac.compare_digest(signature.encode('utf-8', 'surrogateescape'), expected)
+
+
+def profile_dir(app):
+    return os.path.join(app.instance_path, app.config.get('PROFILE_DIR', 'profiles'))
+
+
+def _path_matches(path, prefixes):
+    return any(p and (path == p or path.startswith(p.rstrip('/') + '/')) for p in prefixes)
+
+
+def _trigger():
+    config = current_app.config
+    if request.method == 'OPTIONS':
+        return None
+    if not _path_matches(request.path, config.get('PROFILE_PATHS', [])):
+        return None
+
+    secret = config.get('PROFILE_SECRET')
+    signature = request.headers.get(PROFILE_HEADER)
+    if secret and signature and verify_signature(secret, request.path, signature):
+        return 'header'
+
+    rate = config.get('PROFILE_SAMPLE_RATE') or 0
+    if rate > 0 and random.random() < rate:
+        return 'sample'
+    return None
+
+
+def _start_profile():
+    trigger = _trigger()
+    if not trigger or not _profile_lock.acquire(blocking=False):
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool (e.g. a debugger) owns the profiler slot
+        _profile_lock.release()
+        return
+
+    g._profile = {
+        'trigger': trigger,
+        'started_at': datetime.now(timezone.utc),
+        'start': time.perf_counter(),
+        'queries': [],
+        'status': None,
+        'profiler': profiler,
+    }
+
+
+def _record_status(response):
+    state = g.get('_profile')
+    if state is not None:
+        state['status'] = response.status_code
+    return response
+
+
+def _finish_profile(exc):
+    state = g.pop('_profile', None)
+    if state is None:
+        return
+
+    try:
+        state['profiler'].disable()
+    finally:
+        _profile_lock.release()
+
+    app = current_app._get_current_object()
+    try:
+        summary = {
+            'method': request.method,
+            'path': request.path,
+            'status': state['status'] if exc is None else 500,
+            'error': str(exc) if exc is not None else None,
+            'user_id': _current_user_id(),
+            'trigger': state['trigger'],
+            'duration_ms': round((time.perf_counter() - state['start']) * 1000, 3),
+        }
+        _writer.submit(_write_profile, app, state, summary)
+    except Exception:
+        app.logger.exception('Failed to record request profile')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context() and g.get('_profile') is not None:
+        context._profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_profile_start', None)
+    if start is None or not has_request_context() or g.get('_profile') is None:
+        return
+    g._profile['queries'].append({
+        'statement': statement,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+    })
+
+
+def _current_user_id():
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def _top_functions(profiler, limit=20):
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        'function': f"{filename}:{line}({name})",
+        'calls': nc,
+        'tottime_ms': round(tt * 1000, 3),
+        'cumtime_ms': round(ct * 1000, 3),
+    } for (filename, line, name), (cc, nc, tt, ct, callers) in rows]
+
+
+def _write_profile(app, state, summary):
+    try:
+        directory = profile_dir(app)
+        os.makedirs(directory, exist_ok=True)
+
+        slug = summary['path'].strip('/').replace('/', '_') or 'root'
+        name = f"{state['started_at'].strftime('%Y%m%dT%H%M%S%f')}-{summary['method']}-{slug}-{os.getpid()}"
+
+        state['profiler'].dump_stats(os.path.join(directory, f'{name}.prof'))
+
+        queries = state['queries']
+        summary = {
+            'name': name,
+            'timestamp': state['started_at'].isoformat(),
+            **summary,
+            'sql_count': len(queries),
+            'sql_total_ms': round(sum(q['duration_ms'] for q in queries), 3),
+            'queries': queries,
+            'top_functions': _top_functions(state['profiler']),
+        }
+        # Write then rename so `flask profiles list` never sees a partial summary
+        path = os.path.join(directory, f'{name}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+        os.replace(path + '.tmp', path)
+
+        _rotate(directory, app.config['PROFILE_MAX_FILES'])
+    except Exception:
+        app.logger.exception('Failed to write request profile')
+
+
+def _rotate(directory, max_files):
+    names = _profile_names(directory)
+    for name in names[:max(len(names) - max_files, 0)]:
+        for ext in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(directory, name + ext))
+            except FileNotFoundError:
+                pass
+
+
+def _profile_names(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(f[:-len('.json')] for f in os.listdir(directory) if f.endswith('.json'))
+
+
+def _load_summary(directory, name):
+    with open(os.path.join(directory, f'{name}.json')) as f:
+        return json.load(f)
+
+
+@profiles_cli.command('list')
+@click.option('--limit', default=20, show_default=True, help='Number of most recent profiles to show.')
+def list_profiles(limit):
+    directory = profile_dir(current_app)
+    names = _profile_names(directory)[-limit:]
+    if not names:
+        click.echo(f'No profiles in {directory}')
+        return
+
+    for name in reversed(names):
+        try:
+            s = _load_summary(directory, name)
+            line = (
+                f"{s['name']}  {s['method']:6} {s['path']:28} status={s['status']} "
+                f"{s['duration_ms']:.1f}ms sql={s['sql_count']} ({s['sql_total_ms']:.1f}ms) "
+                f"user={s['user_id']} via={s['trigger']}"
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            line = f'{name}  (skipped, unreadable summary: {e!r})'
+        click.echo(line)
+
+
+@profiles_cli.command('show')
+@click.argument('name')
+@click.option('--limit', default=15, show_default=True, help='Number of functions and queries to show.')
+def show_profile(name, limit):
+    directory = profile_dir(current_app)
+    if not os.path.exists(os.path.join(directory, f'{name}.json')):
+        raise click.ClickException(f'Profile not found: {name}')
+
+    s = _load_summary(directory, name)
+    click.echo(f"{s['method']} {s['path']} -> {s['status']} in {s['duration_ms']:.1f}ms "
+               f"(user={s['user_id']}, via={s['trigger']}, at {s['timestamp']})")
+    if s.get('error'):
+        click.echo(f"Error: {s['error']}")
+
+    click.echo(f"\nSQL: {s['sql_count']} queries, {s['sql_total_ms']:.1f}ms total")
+    for q in sorted(s['queries'], key=lambda q: q['duration_ms'], reverse=True)[:limit]:
+        click.echo(f"  {q['duration_ms']:8.2f}ms  {' '.join(q['statement'].split())}")
+
+    click.echo('\nTop functions by cumulative time:')
+    prof_path = os.path.join(directory, f'{name}.prof')
+    if os.path.exists(prof_path):
+        pstats.Stats(prof_path).sort_stats('cumulative').print_stats(limit)
+    else:
+        for fn in s['top_functions'][:limit]:
+            click.echo(f"  {fn['cumtime_ms']:8.2f}ms  {fn['calls']:6} calls  {fn['function']}")
+
+
+@profiles_cli.command('sign')
+@click.argument('path')
+@click.option('--ttl', default=3600, show_default=True, help='Seconds until the signature expires.')
+def sign_profile_path(path, ttl):
+    secret = current_app.config.get('PROFILE_SECRET')
+    if not secret:
+        raise click.ClickException('PROFILE_SECRET is not set')
+    click.echo(f'{PROFILE_HEADER}: {sign_path(secret, path, time.time() + ttl)}')
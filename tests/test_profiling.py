@@ -0,0 +1,203 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import config
+from src import create_app, db, profiling
+
+
+@pytest.fixture(autouse=True)
+def clean_listeners():
+    yield
+    for name, fn in (('before_cursor_execute', profiling._before_cursor_execute),
+                     ('after_cursor_execute', profiling._after_cursor_execute)):
+        if event.contains(Engine, name, fn):
+            event.remove(Engine, name, fn)
+
+
+def make_app(monkeypatch, tmp_path, **settings):
+    monkeypatch.setattr(config.Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite://')
+    monkeypatch.setattr(config.Config, 'PROFILE_SECRET', None)
+    monkeypatch.setattr(config.Config, 'PROFILE_SAMPLE_RATE', '0')
+    for key, value in settings.items():
+        monkeypatch.setattr(config.Config, key, value)
+
+    app = create_app()
+    app.instance_path = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def auth_headers(client):
+    client.post('/api/auth/register', json={'username': 'ann', 'email': 'ann@example.com', 'password': 'pw'})
+    token = client.post('/api/auth/login', json={'username': 'ann', 'password': 'pw'}).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def captured(app):
+    profiling._writer.submit(lambda: None).result()
+    return profiling._profile_names(profiling.profile_dir(app))
+
+
+def test_off_by_default_registers_no_hooks(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path)
+
+    assert profiling._start_profile not in app.before_request_funcs.get(None, [])
+    assert profiling._finish_profile not in app.teardown_request_funcs.get(None, [])
+    assert not event.contains(Engine, 'before_cursor_execute', profiling._before_cursor_execute)
+    assert not event.contains(Engine, 'after_cursor_execute', profiling._after_cursor_execute)
+
+
+def test_invalid_settings_disable_profiling(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path, PROFILE_SECRET='s3cret', PROFILE_SAMPLE_RATE='lots')
+
+    assert profiling._start_profile not in app.before_request_funcs.get(None, [])
+    assert not event.contains(Engine, 'before_cursor_execute', profiling._before_cursor_execute)
+
+
+def test_sample_rate_is_clamped(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path, PROFILE_SAMPLE_RATE='7')
+    assert app.config['PROFILE_SAMPLE_RATE'] == 1.0
+
+
+def test_signed_request_is_captured_with_sql(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path, PROFILE_SECRET='s3cret')
+    client = app.test_client()
+    headers = auth_headers(client)
+    headers[profiling.PROFILE_HEADER] = profiling.sign_path('s3cret', '/api/bucket-list', time.time() + 60)
+
+    assert client.get('/api/bucket-list', headers=headers).status_code == 200
+
+    names = captured(app)
+    assert len(names) == 1
+    summary = profiling._load_summary(profiling.profile_dir(app), names[0])
+    assert summary['path'] == '/api/bucket-list'
+    assert summary['trigger'] == 'header'
+    assert summary['status'] == 200
+    assert summary['sql_count'] > 0
+    assert os.path.exists(os.path.join(profiling.profile_dir(app), names[0] + '.prof'))
+
+
+@pytest.mark.parametrize('signature', [
+    None,
+    'garbage',
+    f'{int(time.time()) + 60}.deadbeef',
+    profiling.sign_path('wrong', '/api/bucket-list', time.time() + 60),
+    profiling.sign_path('s3cret', '/api/profile', time.time() + 60),
+    profiling.sign_path('s3cret', '/api/bucket-list', time.time() - 1),
+    f'{int(time.time()) + 60}.é',
+], ids=['missing', 'garbage', 'bad-digest', 'wrong-secret', 'wrong-path', 'expired', 'non-ascii'])
+def test_bad_signature_is_not_captured(monkeypatch, tmp_path, signature):
+    app = make_app(monkeypatch, tmp_path, PROFILE_SECRET='s3cret')
+    client = app.test_client()
+    headers = auth_headers(client)
+    if signature is not None:
+        headers[profiling.PROFILE_HEADER] = signature
+
+    assert client.get('/api/bucket-list', headers=headers).status_code == 200
+    assert captured(app) == []
+
+
+def test_profile_paths_are_normalized(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path, PROFILE_SAMPLE_RATE='1',
+                   PROFILE_PATHS='/api/bucket-list, /api/profile ,,'.split(','))
+    assert app.config['PROFILE_PATHS'] == ['/api/bucket-list', '/api/profile']
+
+
+def test_verify_signature_rejects_expired():
+    signature = profiling.sign_path('s3cret', '/api/profile', 1000)
+    assert profiling.verify_signature('s3cret', '/api/profile', signature, now=999)
+    assert not profiling.verify_signature('s3cret', '/api/profile', signature, now=1001)
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('/api/profile', True),
+    ('/api/profile/', True),
+    ('/api/bucket-list/12', True),
+    ('/api/profiles', False),
+    ('/api/bucket-listing', False),
+    ('/api', False),
+])
+def test_path_matches(path, expected):
+    assert profiling._path_matches(path, ['/api/bucket-list', '/api/profile', '']) is expected
+
+
+def test_rotate_keeps_max_files_pairs(tmp_path):
+    for i in range(5):
+        for ext in ('.json', '.prof'):
+            (tmp_path / f'2026010{i}-GET-api_profile{ext}').write_text('{}')
+
+    profiling._rotate(str(tmp_path), 3)
+
+    assert sorted(os.listdir(tmp_path)) == [
+        f'2026010{i}-GET-api_profile{ext}' for i in (2, 3, 4) for ext in ('.json', '.prof')
+    ]
+
+
+def test_list_skips_unreadable_summaries(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path, PROFILE_SAMPLE_RATE='1')
+    client = app.test_client()
+    headers = auth_headers(client)
+    assert client.get('/api/profile', headers=headers).status_code == 200
+    good = captured(app)[0]
+
+    directory = profiling.profile_dir(app)
+    with open(os.path.join(directory, '00000000-truncated.json'), 'w') as f:
+        f.write('{"name": ')
+    with open(os.path.join(directory, '00000001-foreign.json'), 'w') as f:
+        f.write('{"hello": "world"}')
+
+    result = app.test_cli_runner().invoke(args=['profiles', 'list'])
+
+    assert result.exit_code == 0
+    assert good in result.output
+    assert '00000000-truncated  (skipped' in result.output
+    assert '00000001-foreign  (skipped' in result.output
+    assert not any(f.endswith('.tmp') for f in os.listdir(directory))
+
+
+def test_busy_profiler_does_not_change_response(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path, PROFILE_SAMPLE_RATE='1')
+    client = app.test_client()
+    headers = auth_headers(client)
+    before = captured(app)
+
+    assert profiling._profile_lock.acquire(blocking=False)
+    try:
+        assert client.get('/api/profile', headers=headers).status_code == 200
+    finally:
+        profiling._profile_lock.release()
+    assert captured(app) == before
+
+    assert client.get('/api/profile', headers=headers).status_code == 200
+    assert len(captured(app)) == len(before) + 1
+
+
+def test_profiler_in_use_elsewhere_does_not_change_response(monkeypatch, tmp_path):
+    class BusyProfile:
+        def enable(self):
+            raise ValueError('Another profiling tool is already active')
+
+    app = make_app(monkeypatch, tmp_path, PROFILE_SAMPLE_RATE='1')
+    client = app.test_client()
+    headers = auth_headers(client)
+    before = captured(app)
+    monkeypatch.setattr(profiling.cProfile, 'Profile', BusyProfile)
+
+    assert client.get('/api/profile', headers=headers).status_code == 200
+    assert captured(app) == before
+    assert not profiling._profile_lock.locked()
+
+
+def test_sign_command_uses_ttl(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path, PROFILE_SECRET='s3cret')
+    result = app.test_cli_runner().invoke(args=['profiles', 'sign', '/api/profile', '--ttl', '30'])
+
+    signature = result.output.split(': ', 1)[1].strip()
+    expires = int(signature.split('.')[0])
+    assert time.time() < expires <= time.time() + 30
+    assert profiling.verify_signature('s3cret', '/api/profile', signature)